@@ -0,0 +1,480 @@
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import threading
+import itertools
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+from colorama import init, Fore
+from dotenv import load_dotenv
+
+init(autoreset=True)
+load_dotenv()
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+FINISHED_STATES = (DONE, FAILED)
+
+JOB_KINDS = ("carousel", "image", "slideshow", "upload")
+
+# Kinds that need output/ to themselves (carousel cleans it); image jobs can share it
+EXCLUSIVE_KINDS = ("carousel", "slideshow", "upload")
+
+# Progress events are only published when progress moved by at least this much (0.0 - 1.0)
+PROGRESS_STEP = 0.02
+
+# An idle event stream gets a ": ping" comment this often, so dead clients are noticed
+SSE_KEEPALIVE_SECONDS = 15.0
+
+HTTP_REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+class WorkspaceLock:
+    """
+    Shared/exclusive lock around the output/ folder, granted in submission order.
+
+    reserve() takes a place in line and must be called in the order jobs are
+    submitted; acquire() then blocks the worker thread until that place comes up.
+    This keeps an image job from running before the carousel job submitted ahead
+    of it, while consecutive image jobs still share the folder.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._waiting = collections.deque()
+        self._readers = 0
+        self._writer = False
+        self._seq = itertools.count()
+
+    def reserve(self, exclusive):
+        # seq keeps tickets distinct for the deque's equality-based lookups
+        ticket = {"seq": next(self._seq), "exclusive": exclusive}
+        with self._cond:
+            self._waiting.append(ticket)
+        return ticket
+
+    def acquire(self, ticket):
+        with self._cond:
+            self._cond.wait_for(lambda: self._waiting[0] is ticket and self._can_enter(ticket))
+            self._waiting.popleft()
+            if ticket["exclusive"]:
+                self._writer = True
+            else:
+                self._readers += 1
+            # The next ticket may be a shared one that can enter alongside this one
+            self._cond.notify_all()
+
+    def release(self, ticket):
+        with self._cond:
+            if ticket["exclusive"]:
+                self._writer = False
+            else:
+                self._readers -= 1
+            self._cond.notify_all()
+
+    def discard(self, ticket):
+        """Gives up a place in line that was never acquired. No-op otherwise."""
+        with self._cond:
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+
+    def _can_enter(self, ticket):
+        if ticket["exclusive"]:
+            return not self._writer and self._readers == 0
+        return not self._writer
+
+class GeneratorBackend:
+    """Runs jobs through tiktok_generator. Every method blocks and is meant for an executor."""
+
+    def __init__(self):
+        self._generator = None
+
+    def load(self):
+        """
+        Imports tiktok_generator. Call from main() before serving: the import checks
+        OPENAI_API_KEY and exits with a console prompt when it is missing.
+        """
+        if self._generator is None:
+            import tiktok_generator
+            self._generator = tiktok_generator
+        return self._generator
+
+    def carousel(self, params, progress):
+        data = self.load().generate_carousel()
+        if data is None:
+            raise RuntimeError("Carousel generation failed, see service console.")
+        return data
+
+    def image(self, params, progress):
+        slide_number = int(params.get("slide_number", 0))
+        if not 1 <= slide_number <= 5:
+            raise ValueError("slide_number must be 1 through 5.")
+        filename = self.load().generate_image(slide_number)
+        if filename is None:
+            raise RuntimeError(f"Image generation for slide #{slide_number} failed, see service console.")
+        return {"path": filename}
+
+    def slideshow(self, params, progress):
+        path = self.load().generate_slideshow(on_progress=progress)
+        if path is None:
+            raise RuntimeError("Slideshow generation failed, see service console.")
+        return {"path": path}
+
+    def upload(self, params, progress):
+        result = self.load().upload_post(interactive=False)
+        if not result:
+            raise RuntimeError("Upload failed, see service console.")
+        # posted is False when the review time ran out or the window was closed unposted
+        return {"posted": result["posted"], "caption_set": result["caption_set"]}
+
+class StubBackend:
+    """Offline backend for tests and dry runs: no OpenAI, ffmpeg or browser calls."""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+
+    def carousel(self, params, progress):
+        time.sleep(self.delay)
+        return {
+            "images": [
+                {"slide_number": n, "prompt": f"Stub prompt {n}", "on_screen_caption": f"Stub caption {n}"}
+                for n in range(1, 6)
+            ],
+            "post_description": "Stub description.",
+            "hashtags": ["#stub"],
+        }
+
+    def image(self, params, progress):
+        slide_number = int(params.get("slide_number", 0))
+        if not 1 <= slide_number <= 5:
+            raise ValueError("slide_number must be 1 through 5.")
+        time.sleep(self.delay)
+        return {"path": f"output/slide_{slide_number}_stub.png"}
+
+    def slideshow(self, params, progress):
+        total_frames = 10
+        for frame in range(1, total_frames + 1):
+            time.sleep(self.delay / total_frames)
+            progress(frame, total_frames)
+        return {"path": "output/final_video.mp4"}
+
+    def upload(self, params, progress):
+        time.sleep(self.delay)
+        return {"posted": True, "caption_set": True}
+
+class PipelineService:
+    """
+    Local HTTP service running pipeline stages as async jobs.
+
+    POST /jobs                 {"kind": "carousel|image|slideshow|upload", "params": {...}}
+    GET  /jobs                 list jobs
+    GET  /jobs/<id>            job status and result
+    GET  /jobs/<id>/events     progress stream (text/event-stream), ?after=<seq> to resume
+    GET  /health               job count and open event streams
+
+    API calls and uploads run on a thread pool; slideshow renders get their own
+    executor so a long encode never starves the network-bound stages.
+    Jobs take the output/ folder in submission order (see WorkspaceLock), so
+    submit GENERATE's carousel job before the image jobs that depend on it.
+    """
+
+    def __init__(self, backend=None, io_workers=8, render_workers=1):
+        self.backend = backend or GeneratorBackend()
+        self.jobs = {}
+        self._workspace = WorkspaceLock()
+        self._io_executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="pipeline-io")
+        self._render_executor = ThreadPoolExecutor(max_workers=render_workers, thread_name_prefix="pipeline-render")
+        self._changed = None
+        self._server = None
+        self._loop = None
+        self._open_streams = 0
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def submit(self, kind, params=None):
+        """Creates a job and schedules it on the running loop. Returns the job dict."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}'. Use one of: {', '.join(JOB_KINDS)}")
+
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "params": params or {},
+            "status": QUEUED,
+            "progress": 0.0,
+            "result": None,
+            "error": None,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "events": [],
+        }
+        self.jobs[job_id] = job
+        self._publish(job, {"type": QUEUED})
+        ticket = self._workspace.reserve(kind in EXCLUSIVE_KINDS)
+        asyncio.ensure_future(self._run_job(job, ticket))
+        return job
+
+    async def _run_job(self, job, ticket):
+        executor = self._render_executor if job["kind"] == "slideshow" else self._io_executor
+        stage = getattr(self.backend, job["kind"])
+
+        last_reported = [0.0]
+
+        def progress(done, total):
+            # Called from the executor thread
+            value = min(done / total, 1.0) if total else 1.0
+            if value - last_reported[0] >= PROGRESS_STEP:
+                last_reported[0] = value
+                self._loop.call_soon_threadsafe(self._publish, job, {"type": "progress", "progress": value})
+
+        def run():
+            self._workspace.acquire(ticket)
+            try:
+                # Marks the job running only once it actually holds the workspace
+                self._loop.call_soon_threadsafe(self._mark_running, job)
+                return stage(job["params"], progress)
+            finally:
+                self._workspace.release(ticket)
+
+        try:
+            job["result"] = await self._loop.run_in_executor(executor, run)
+            job["status"] = DONE
+            job["progress"] = 1.0
+        except (Exception, SystemExit) as e:
+            # SystemExit: the generator calls exit() on some fatal errors
+            job["status"] = FAILED
+            job["error"] = str(e) or type(e).__name__
+            print(Fore.RED + f"[{job['id']}] {job['kind']} failed: {job['error']}")
+        finally:
+            # A job that never reached an executor thread must not block the line
+            self._workspace.discard(ticket)
+
+        job["finished_at"] = time.time()
+        self._publish(job, {"type": job["status"], "result": job["result"], "error": job["error"]})
+
+    def _mark_running(self, job):
+        job["status"] = RUNNING
+        job["started_at"] = time.time()
+        self._publish(job, {"type": RUNNING})
+
+    def _publish(self, job, event):
+        if event["type"] == "progress":
+            job["progress"] = event["progress"]
+        event["seq"] = len(job["events"])
+        event["job_id"] = job["id"]
+        event["time"] = time.time()
+        job["events"].append(event)
+        asyncio.ensure_future(self._notify())
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    @staticmethod
+    def _public(job):
+        return {key: value for key, value in job.items() if key != "events"}
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Condition()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        print(Fore.GREEN + f"Pipeline service listening on http://{host}:{port}")
+        return self._server
+
+    async def serve_forever(self, host="127.0.0.1", port=8765):
+        server = await self.start(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        if self._server:
+            self._server.close()
+        self._io_executor.shutdown(wait=False)
+        self._render_executor.shutdown(wait=False)
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, value = line.decode("latin-1").split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+            body = b""
+            length = int(headers.get("content-length") or 0)
+            if length:
+                body = await reader.readexactly(length)
+
+            path, _, query = target.partition("?")
+            await self._route(method.upper(), path.rstrip("/") or "/", parse_qs(query), body, reader, writer)
+
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            await self._send_json(writer, 400, {"error": f"Malformed request: {e}"})
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            print(Fore.RED + f"Request failed: {e}")
+            await self._send_json(writer, 500, {"error": str(e)})
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _route(self, method, path, query, body, reader, writer):
+        parts = path.strip("/").split("/")
+
+        if path == "/health":
+            return await self._send_json(writer, 200, {"status": "ok", "jobs": len(self.jobs), "streams": self._open_streams})
+
+        if parts[0] != "jobs":
+            return await self._send_json(writer, 404, {"error": "Not found"})
+
+        if len(parts) == 1:
+            if method == "GET":
+                return await self._send_json(writer, 200, {"jobs": [self._public(job) for job in self.jobs.values()]})
+            if method == "POST":
+                try:
+                    payload = json.loads(body or b"{}")
+                    job = self.submit(payload.get("kind"), payload.get("params"))
+                except (ValueError, AttributeError) as e:
+                    return await self._send_json(writer, 400, {"error": str(e)})
+                return await self._send_json(writer, 202, self._public(job))
+            return await self._send_json(writer, 405, {"error": "Method not allowed"})
+
+        job = self.jobs.get(parts[1])
+        if job is None or len(parts) > 3 or (len(parts) == 3 and parts[2] != "events"):
+            return await self._send_json(writer, 404, {"error": "Not found"})
+        if method != "GET":
+            return await self._send_json(writer, 405, {"error": "Method not allowed"})
+
+        if len(parts) == 2:
+            return await self._send_json(writer, 200, self._public(job))
+
+        after = int(query.get("after", ["-1"])[0])
+        await self._stream_events(job, after + 1, reader, writer)
+
+    async def _stream_events(self, job, index, reader, writer):
+        """
+        Streams job events as Server-Sent Events until the job finishes or the
+        client goes away. A client disconnect shows up as EOF on reader; idle
+        streams also get a keep-alive comment so half-open connections fail on write.
+        """
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        await writer.drain()
+
+        self._open_streams += 1
+        disconnected = asyncio.ensure_future(self._wait_for_eof(reader))
+        try:
+            while True:
+                events = job["events"][index:]
+                for event in events:
+                    writer.write(f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+                index += len(events)
+                await writer.drain()
+
+                if job["status"] in FINISHED_STATES and index >= len(job["events"]):
+                    return
+
+                new_events = asyncio.ensure_future(self._wait_for_events(job, index))
+                done, _ = await asyncio.wait(
+                    {new_events, disconnected},
+                    timeout=SSE_KEEPALIVE_SECONDS,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if new_events not in done:
+                    new_events.cancel()
+                if disconnected in done:
+                    return
+                if not done:
+                    # Sent on the next drain(), which raises if the client is gone
+                    writer.write(b": ping\n\n")
+        finally:
+            disconnected.cancel()
+            self._open_streams -= 1
+
+    async def _wait_for_events(self, job, index):
+        async with self._changed:
+            await self._changed.wait_for(lambda: len(job["events"]) > index)
+
+    @staticmethod
+    async def _wait_for_eof(reader):
+        """Returns once the client closed its side; anything it sends meanwhile is ignored."""
+        try:
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+
+    @staticmethod
+    async def _send_json(writer, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1")
+            + body
+        )
+        await writer.drain()
+
+def main():
+    """Starts the service. Pass --stub to run without OpenAI, ffmpeg or a browser."""
+    if "--stub" in sys.argv[1:]:
+        backend = StubBackend()
+    else:
+        backend = GeneratorBackend()
+        # Fails fast on the main thread (missing OPENAI_API_KEY) before serving
+        backend.load()
+    host = os.getenv("SERVICE_HOST") or "127.0.0.1"
+    port = int(os.getenv("SERVICE_PORT") or 8765)
+    io_workers = int(os.getenv("SERVICE_IO_WORKERS") or 8)
+
+    service = PipelineService(backend=backend, io_workers=io_workers)
+    try:
+        asyncio.run(service.serve_forever(host, port))
+    except KeyboardInterrupt:
+        print(Fore.YELLOW + "\nPipeline service stopped.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+import os
+import sys
+import time
+import uuid
+import queue
+import signal
+import threading
+import multiprocessing
+import multiprocessing.connection
+from multiprocessing.managers import SyncManager
+from colorama import init, Fore
+from dotenv import load_dotenv
+
+import video_export
+
+init(autoreset=True)
+load_dotenv()
+
+# Job states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# Workers only report progress when it moved by at least this much (0.0 - 1.0)
+PROGRESS_STEP = 0.02
+
+# How often the collector checks for crashed workers, in seconds
+WORKER_CHECK_INTERVAL = 1.0
+
+def _ignore_sigint():
+    """
+    Ctrl+C reaches the whole process group. Child processes ignore it so only the
+    parent reacts, and cancellation goes through the cancel flags instead.
+    The ignore is inherited by the ffmpeg encoders the workers start.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _render_worker(worker_id, job_queue, events, cancel_flags, assignments):
+    """
+    Worker process loop: renders jobs from job_queue until it receives None.
+    Events go out on this worker's own pipe (events), sent synchronously, so a
+    worker that dies can't leave a shared queue's write lock held.
+    """
+    _ignore_sigint()
+    pid = os.getpid()
+    while True:
+        job = job_queue.get()
+        if job is None:
+            break
+
+        job_id = job["id"]
+        # Recorded through the manager (synchronously) so the parent can fail the
+        # job even if this process dies before its queued events are flushed
+        assignments[pid] = job_id
+        if cancel_flags.get(job_id):
+            events.send({"type": CANCELLED, "job_id": job_id, "worker": worker_id})
+            assignments.pop(pid, None)
+            continue
+
+        events.send({"type": RUNNING, "job_id": job_id, "worker": worker_id})
+        last_reported = [0.0]
+
+        def on_progress(done, total):
+            if cancel_flags.get(job_id):
+                raise video_export.ExportCancelled()
+            progress = min(done / total, 1.0)
+            if progress - last_reported[0] >= PROGRESS_STEP:
+                last_reported[0] = progress
+                events.send({"type": "progress", "job_id": job_id, "worker": worker_id, "progress": progress})
+
+        output_dir = job["output_dir"]
+        try:
+            images = job.get("images") or video_export.find_slide_images(output_dir)
+            if not images:
+                raise ValueError(f"No slide images found in {output_dir}")
+
+            os.makedirs(output_dir, exist_ok=True)
+            video = video_export.build_slideshow_clip(images)
+            reports = video_export.export_profiles(
+                video,
+                output_dir,
+                job["profiles"],
+                threads=job["threads"],
+                on_progress=on_progress,
+            )
+            video.close()
+
+            errors = {name: r["error"] for name, r in reports.items() if r["error"]}
+            if errors and len(errors) == len(reports):
+                events.send({"type": FAILED, "job_id": job_id, "worker": worker_id, "error": str(errors), "reports": reports})
+            else:
+                events.send({"type": DONE, "job_id": job_id, "worker": worker_id, "reports": reports})
+
+        except video_export.ExportCancelled:
+            # Drop half-written videos so nothing picks them up later
+            for profile_name, profile in job["profiles"].items():
+                path = os.path.join(output_dir, profile.get("filename", f"{profile_name}_video.mp4"))
+                if os.path.exists(path):
+                    os.remove(path)
+            events.send({"type": CANCELLED, "job_id": job_id, "worker": worker_id})
+
+        except Exception as e:
+            events.send({"type": FAILED, "job_id": job_id, "worker": worker_id, "error": str(e)})
+
+        assignments.pop(pid, None)
+
+class RenderPool:
+    """
+    Renders slideshow jobs across several worker processes.
+
+    Each worker renders one job at a time within threads_per_job cores: one for
+    compositing and the rest for the profiles' encoders. That budget is raised to
+    at least one core per encoder plus the compositor, and the default worker
+    count is cores // threads_per_job, so the pool does not oversubscribe.
+    The pending queue is bounded: submit() blocks (or returns None) once it is full.
+    """
+
+    def __init__(self, workers=None, threads_per_job=4, max_pending=None, on_event=None, profiles=None):
+        self.profiles = profiles if profiles is not None else video_export.load_export_profiles()
+        needed = video_export.min_threads(len(self.profiles))
+        if threads_per_job < needed:
+            print(Fore.YELLOW + f"threads_per_job raised from {threads_per_job} to {needed}: "
+                  f"{len(self.profiles)} encoder(s) plus the compositor.")
+        self.threads_per_job = max(threads_per_job, needed)
+        self.workers = workers or max(1, (os.cpu_count() or 1) // self.threads_per_job)
+        self.max_pending = max_pending or self.workers * 2
+        self.on_event = on_event
+
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+
+        self._job_queue = multiprocessing.Queue(maxsize=self.max_pending)
+        # Worker id -> read end of that worker's event pipe
+        self._event_readers = {}
+        # Wakes the collector up when the pool shuts down
+        self._stop_reader, self._stop_writer = multiprocessing.Pipe(duplex=False)
+        self._manager = SyncManager()
+        self._manager.start(_ignore_sigint)
+        self._cancel_flags = self._manager.dict()
+        # Worker pid -> job id it is currently handling
+        self._assignments = self._manager.dict()
+
+        self._processes = []
+        self._collector = None
+        self._started_at = None
+        self._shutting_down = False
+
+    def start(self):
+        """Spawns the worker processes and the event collector thread."""
+        print(Fore.CYAN + f"Starting render pool: {self.workers} worker(s) x {self.threads_per_job} core(s)")
+        for worker_id in range(self.workers):
+            self._processes.append(self._spawn_worker(worker_id))
+
+        self._started_at = time.time()
+        self._collector = threading.Thread(target=self._collect_events, daemon=True)
+        self._collector.start()
+        return self
+
+    def submit(self, output_dir, images=None, profiles=None, block=True, timeout=None):
+        """
+        Queues a render job for the slides in output_dir, using the pool's profiles
+        unless others are given. Returns the job id, or None if the queue stayed full
+        (block=False or timeout). Raises ValueError if the profiles don't fit the
+        per-job core budget.
+        """
+        profiles = profiles if profiles is not None else self.profiles
+        if video_export.min_threads(len(profiles)) > self.threads_per_job:
+            raise ValueError(f"{len(profiles)} profiles need {video_export.min_threads(len(profiles))} cores per job, "
+                             f"the pool was sized for {self.threads_per_job}.")
+
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "id": job_id,
+            "output_dir": output_dir,
+            "images": images,
+            "profiles": profiles,
+            "threads": self.threads_per_job,
+        }
+
+        with self._lock:
+            self.jobs[job_id] = {
+                "id": job_id,
+                "output_dir": output_dir,
+                "status": PENDING,
+                "progress": 0.0,
+                "worker": None,
+                "reports": None,
+                "error": None,
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+            }
+
+        try:
+            self._job_queue.put(job, block=block, timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                del self.jobs[job_id]
+            print(Fore.YELLOW + "Render queue is full, job not submitted.")
+            return None
+
+        return job_id
+
+    def cancel(self, job_id):
+        """Cancels a pending or running job. Returns False if it already finished."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if not job or job["status"] in FINISHED_STATES:
+                return False
+        self._cancel_flags[job_id] = True
+        return True
+
+    def status(self, job_id):
+        """Returns a snapshot of the job's state dict, or None for unknown ids."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait(self, job_ids=None, timeout=None):
+        """Blocks until the given jobs (default: all) finish. Returns True if they did."""
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._finished:
+            while True:
+                ids = job_ids if job_ids is not None else list(self.jobs)
+                if all(self.jobs[j]["status"] in FINISHED_STATES for j in ids if j in self.jobs):
+                    return True
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._finished.wait(remaining)
+
+    def stats(self):
+        """Returns completed/failed/cancelled counts and renders per minute since start."""
+        with self._lock:
+            counts = {state: 0 for state in (PENDING, RUNNING) + FINISHED_STATES}
+            for job in self.jobs.values():
+                counts[job["status"]] += 1
+        elapsed = time.time() - self._started_at if self._started_at else 0.0
+        counts["elapsed_seconds"] = elapsed
+        counts["renders_per_minute"] = counts[DONE] / (elapsed / 60) if elapsed > 0 else 0.0
+        return counts
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        """
+        Stops the workers. With wait=True, queued jobs are rendered first.
+        cancel_pending drops queued jobs and asks running ones to stop.
+        """
+        if cancel_pending:
+            self._cancel_queued_jobs()
+            with self._lock:
+                running = [job_id for job_id, job in self.jobs.items() if job["status"] not in FINISHED_STATES]
+            for job_id in running:
+                self._cancel_flags[job_id] = True
+
+        if wait:
+            self.wait()
+
+        with self._lock:
+            self._shutting_down = True
+            processes = list(self._processes)
+
+        for _ in processes:
+            try:
+                self._job_queue.put(None, timeout=1.0)
+            except queue.Full:
+                # Workers that never get a sentinel are terminated below
+                break
+        for process in processes:
+            process.join(timeout=None if wait else 5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        self._stop_writer.send(None)
+        if self._collector:
+            self._collector.join()
+        # The workers are gone, so whatever is left in their pipes is final
+        for worker_id in list(self._event_readers):
+            self._drain_events(worker_id)
+        self._manager.shutdown()
+
+    def _spawn_worker(self, worker_id):
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=_render_worker,
+            args=(worker_id, self._job_queue, writer, self._cancel_flags, self._assignments),
+            daemon=True,
+        )
+        process.start()
+        # Only the worker keeps the write end, so the reader sees EOF when it exits
+        writer.close()
+        self._event_readers[worker_id] = reader
+        return process
+
+    def _cancel_queued_jobs(self):
+        """Takes every job still waiting in the queue out of it and marks it cancelled."""
+        while True:
+            try:
+                job = self._job_queue.get(timeout=0.1)
+            except queue.Empty:
+                break
+            if job is None:
+                continue
+            event = {"type": CANCELLED, "job_id": job["id"], "worker": None}
+            self._apply_event(event)
+            self._emit(event)
+
+    def _collect_events(self):
+        """Applies worker events to self.jobs and forwards them to on_event."""
+        last_check = time.time()
+        while True:
+            readers = list(self._event_readers.values())
+            ready = multiprocessing.connection.wait(readers + [self._stop_reader], timeout=WORKER_CHECK_INTERVAL)
+            if self._stop_reader in ready:
+                break
+
+            for reader in ready:
+                try:
+                    event = reader.recv()
+                except (EOFError, OSError):
+                    # The worker exited; _replace_dead_workers deals with it
+                    self._event_readers = {w: r for w, r in self._event_readers.items() if r is not reader}
+                    reader.close()
+                    continue
+                self._apply_event(event)
+                self._emit(event)
+
+            if time.time() - last_check >= WORKER_CHECK_INTERVAL:
+                self._replace_dead_workers()
+                last_check = time.time()
+
+    def _drain_events(self, worker_id):
+        """Applies the events still buffered in an exited worker's pipe and closes it."""
+        reader = self._event_readers.pop(worker_id, None)
+        if reader is None:
+            return
+        try:
+            while reader.poll():
+                event = reader.recv()
+                self._apply_event(event)
+                self._emit(event)
+        except (EOFError, OSError):
+            pass
+        reader.close()
+
+    def _apply_event(self, event):
+
+        with self._finished:
+            job = self.jobs.get(event["job_id"])
+            if job is None:
+                return
+            event_type = event["type"]
+            if job["status"] in FINISHED_STATES and event_type in (RUNNING, "progress"):
+                # Late event from a worker whose job was already failed as crashed
+                return
+            if event_type == RUNNING:
+                job["status"] = RUNNING
+                job["worker"] = event["worker"]
+                job["started_at"] = time.time()
+            elif event_type == "progress":
+                job["progress"] = event["progress"]
+            else:
+                job["status"] = event_type
+                job["reports"] = event.get("reports")
+                job["error"] = event.get("error")
+                job["finished_at"] = time.time()
+                if event_type == DONE:
+                    job["progress"] = 1.0
+                self._finished.notify_all()
+
+    def _emit(self, event):
+        if self.on_event:
+            try:
+                self.on_event(event)
+            except Exception as e:
+                print(Fore.RED + f"Render pool event handler failed: {e}")
+
+    def _replace_dead_workers(self):
+        """Fails the job of a crashed worker process and starts a new worker in its place."""
+        with self._lock:
+            if self._shutting_down:
+                return
+            dead = [worker_id for worker_id, process in enumerate(self._processes) if not process.is_alive()]
+        if not dead:
+            return
+        # Events the worker sent before dying still count (it may have finished its job)
+        for worker_id in dead:
+            self._drain_events(worker_id)
+
+        failed = []
+        with self._finished:
+            if self._shutting_down:
+                return
+            for worker_id in dead:
+                process = self._processes[worker_id]
+                job_id = self._assignments.pop(process.pid, None)
+                job = self.jobs.get(job_id)
+                if job and job["status"] not in FINISHED_STATES:
+                    job["status"] = FAILED
+                    job["error"] = f"Worker {worker_id} exited with code {process.exitcode}"
+                    job["finished_at"] = time.time()
+                    failed.append({"type": FAILED, "job_id": job_id, "worker": worker_id, "error": job["error"]})
+                    self._finished.notify_all()
+
+                print(Fore.YELLOW + f"Render worker {worker_id} died (exit code {process.exitcode}), restarting it.")
+                self._processes[worker_id] = self._spawn_worker(worker_id)
+
+        for event in failed:
+            self._emit(event)
+
+def print_event(event):
+    """Default console progress printer for render pool events."""
+    job_id = event["job_id"]
+    if event["type"] == "progress":
+        print(Fore.WHITE + f"[{job_id}] {event['progress'] * 100:.0f}%")
+    elif event["type"] == RUNNING:
+        print(Fore.CYAN + f"[{job_id}] Rendering on worker {event['worker']}...")
+    elif event["type"] == DONE:
+        print(Fore.GREEN + f"[{job_id}] Done.")
+    elif event["type"] == FAILED:
+        print(Fore.RED + f"[{job_id}] Failed: {event.get('error')}")
+    elif event["type"] == CANCELLED:
+        print(Fore.YELLOW + f"[{job_id}] Cancelled.")
+
+def main():
+    """Renders every slide folder given on the command line through the pool."""
+    if len(sys.argv) < 2:
+        print("Usage: python render_pool.py <slides_dir> [<slides_dir> ...]")
+        print("  RENDER_WORKERS / RENDER_THREADS_PER_JOB in .env tune the pool size.")
+        return
+
+    workers = int(os.getenv("RENDER_WORKERS") or 0) or None
+    threads_per_job = int(os.getenv("RENDER_THREADS_PER_JOB") or 4)
+
+    pool = RenderPool(workers=workers, threads_per_job=threads_per_job, on_event=print_event).start()
+    try:
+        for output_dir in sys.argv[1:]:
+            if not os.path.isdir(output_dir):
+                print(Fore.RED + f"Not a directory: {output_dir}")
+                continue
+            pool.submit(output_dir)
+        pool.wait()
+    except KeyboardInterrupt:
+        print(Fore.YELLOW + "\nCancelling remaining renders...")
+        pool.shutdown(wait=False, cancel_pending=True)
+        return
+
+    stats = pool.stats()
+    pool.shutdown()
+    print(Fore.MAGENTA + f"\nRendered {stats[DONE]} job(s) in {stats['elapsed_seconds']:.1f}s "
+          f"({stats['renders_per_minute']:.2f} renders/min), "
+          f"{stats[FAILED]} failed, {stats[CANCELLED]} cancelled.")
+
+if __name__ == "__main__":
+    main()
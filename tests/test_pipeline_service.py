@@ -0,0 +1,206 @@
+import json
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+import pipeline_service
+from pipeline_service import PipelineService, StubBackend
+
+@asynccontextmanager
+async def serve(backend=None):
+    service = PipelineService(backend=backend or StubBackend(delay=0))
+    server = await service.start("127.0.0.1", 0)
+    try:
+        yield service, server.sockets[0].getsockname()[1]
+    finally:
+        service.close()
+        await server.wait_closed()
+
+async def request(port, method, path, body=None):
+    """Sends one HTTP request and returns (status, body bytes)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = body if isinstance(body, bytes) else json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), payload
+
+async def wait_for_job(port, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status, payload = await request(port, "GET", f"/jobs/{job_id}")
+        job = json.loads(payload)
+        if job["status"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+def parse_events(payload):
+    return [json.loads(line[len("data: "):]) for line in payload.decode().splitlines() if line.startswith("data: ")]
+
+def test_submit_and_poll_job():
+    async def scenario():
+        async with serve() as (service, port):
+            status, payload = await request(port, "POST", "/jobs", {"kind": "carousel"})
+            assert status == 202
+            job = json.loads(payload)
+            assert job["kind"] == "carousel"
+            assert "events" not in job
+
+            job = await wait_for_job(port, job["id"])
+            assert job["status"] == "done"
+            assert len(job["result"]["images"]) == 5
+
+            status, payload = await request(port, "GET", "/jobs")
+            assert status == 200
+            assert [j["id"] for j in json.loads(payload)["jobs"]] == [job["id"]]
+
+    asyncio.run(scenario())
+
+def test_failed_job_reports_error():
+    async def scenario():
+        async with serve() as (service, port):
+            status, payload = await request(port, "POST", "/jobs", {"kind": "image", "params": {"slide_number": 9}})
+            assert status == 202
+            job = await wait_for_job(port, json.loads(payload)["id"])
+            assert job["status"] == "failed"
+            assert "slide_number" in job["error"]
+
+    asyncio.run(scenario())
+
+def test_event_stream_and_resume():
+    async def scenario():
+        async with serve() as (service, port):
+            status, payload = await request(port, "POST", "/jobs", {"kind": "slideshow"})
+            job_id = json.loads(payload)["id"]
+
+            status, payload = await request(port, "GET", f"/jobs/{job_id}/events")
+            assert status == 200
+            events = parse_events(payload)
+            types = [event["type"] for event in events]
+            assert types[:2] == ["queued", "running"]
+            assert "progress" in types
+            assert types[-1] == "done"
+            assert [event["seq"] for event in events] == list(range(len(events)))
+
+            # Resuming after the running event only replays what came later
+            status, payload = await request(port, "GET", f"/jobs/{job_id}/events?after=1")
+            assert parse_events(payload) == events[2:]
+
+    asyncio.run(scenario())
+
+def test_error_responses():
+    async def scenario():
+        async with serve() as (service, port):
+            status, payload = await request(port, "POST", "/jobs", {"kind": "nope"})
+            assert status == 400
+            assert "Unknown job kind" in json.loads(payload)["error"]
+
+            status, _ = await request(port, "POST", "/jobs", b"{not json")
+            assert status == 400
+
+            status, _ = await request(port, "GET", "/jobs/missing")
+            assert status == 404
+
+            status, _ = await request(port, "GET", "/elsewhere")
+            assert status == 404
+
+            status, _ = await request(port, "DELETE", "/jobs")
+            assert status == 405
+
+            status, payload = await request(port, "POST", "/jobs", {"kind": "upload"})
+            job_id = json.loads(payload)["id"]
+            status, _ = await request(port, "POST", f"/jobs/{job_id}")
+            assert status == 405
+
+            status, _ = await request(port, "GET", f"/jobs/{job_id}/events?after=x")
+            assert status == 400
+
+    asyncio.run(scenario())
+
+class RecordingBackend(StubBackend):
+    """Records when each stage starts and ends, with a slow carousel."""
+
+    def __init__(self):
+        super().__init__(delay=0)
+        self.log = []
+        self._lock = threading.Lock()
+
+    def _record(self, entry):
+        with self._lock:
+            self.log.append(entry)
+
+    def carousel(self, params, progress):
+        self._record("carousel start")
+        time.sleep(0.2)
+        self._record("carousel end")
+        return super().carousel(params, progress)
+
+    def image(self, params, progress):
+        self._record(f"image {params['slide_number']}")
+        return super().image(params, progress)
+
+def test_workspace_jobs_run_in_submission_order():
+    async def scenario():
+        backend = RecordingBackend()
+        async with serve(backend) as (service, port):
+            ids = []
+            for body in ({"kind": "carousel"}, {"kind": "image", "params": {"slide_number": 1}},
+                         {"kind": "image", "params": {"slide_number": 2}}):
+                status, payload = await request(port, "POST", "/jobs", body)
+                ids.append(json.loads(payload)["id"])
+            for job_id in ids:
+                assert (await wait_for_job(port, job_id))["status"] == "done"
+
+        assert backend.log[:2] == ["carousel start", "carousel end"]
+        assert sorted(backend.log[2:]) == ["image 1", "image 2"]
+
+    asyncio.run(scenario())
+
+async def open_stream(port, job_id):
+    """Opens an event stream and reads up to the first event."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET /jobs/{job_id}/events HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    await reader.readuntil(b"\n\n")
+    return reader, writer
+
+async def open_streams(port):
+    status, payload = await request(port, "GET", "/health")
+    return json.loads(payload)["streams"]
+
+def test_event_stream_ends_when_client_disconnects():
+    async def scenario():
+        async with serve(StubBackend(delay=10)) as (service, port):
+            status, payload = await request(port, "POST", "/jobs", {"kind": "slideshow"})
+            reader, writer = await open_stream(port, json.loads(payload)["id"])
+            assert await open_streams(port) == 1
+
+            writer.close()
+            deadline = time.time() + 2
+            while await open_streams(port) and time.time() < deadline:
+                await asyncio.sleep(0.01)
+            assert await open_streams(port) == 0
+
+    asyncio.run(scenario())
+
+def test_idle_event_stream_sends_keepalive(monkeypatch):
+    monkeypatch.setattr(pipeline_service, "SSE_KEEPALIVE_SECONDS", 0.05)
+
+    async def scenario():
+        async with serve(StubBackend(delay=10)) as (service, port):
+            status, payload = await request(port, "POST", "/jobs", {"kind": "slideshow"})
+            reader, writer = await open_stream(port, json.loads(payload)["id"])
+
+            async def read_until_ping():
+                # The running event may come first
+                while await reader.readuntil(b"\n\n") != b": ping\n\n":
+                    pass
+
+            await asyncio.wait_for(read_until_ping(), 2)
+            writer.close()
+
+    asyncio.run(scenario())
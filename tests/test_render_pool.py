@@ -0,0 +1,146 @@
+import os
+import time
+import multiprocessing
+
+import pytest
+
+import render_pool
+import video_export
+
+# Workers must inherit the patched video_export below, which only fork gives us
+pytestmark = pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="render pool tests patch video_export in forked workers",
+)
+
+PROFILES = {"tiktok": {"filename": "final_video.mp4"}}
+
+class FakeClip:
+    def close(self):
+        pass
+
+def fake_export_profiles(clip, output_dir, profiles, threads=4, on_progress=None):
+    """Stands in for the export pass; the slides folder name picks the behaviour."""
+    name = os.path.basename(output_dir)
+    if name == "crash":
+        os._exit(3)
+
+    path = os.path.join(output_dir, profiles["tiktok"]["filename"])
+    with open(path, "wb") as f:
+        f.write(b"partial")
+
+    total_frames = 200 if name == "slow" else 5
+    for frame in range(1, total_frames + 1):
+        time.sleep(0.01)
+        on_progress(frame, total_frames)
+    return {"tiktok": {"path": path, "error": None}}
+
+@pytest.fixture
+def slides(monkeypatch, tmp_path):
+    monkeypatch.setattr(video_export, "find_slide_images", lambda output_dir: ["slide_1.png"])
+    monkeypatch.setattr(video_export, "build_slideshow_clip", lambda images: FakeClip())
+    monkeypatch.setattr(video_export, "export_profiles", fake_export_profiles)
+
+    def make(name):
+        path = tmp_path / name
+        path.mkdir(exist_ok=True)
+        return str(path)
+
+    return make
+
+@pytest.fixture
+def pool_factory():
+    pools = []
+
+    def make(**kwargs):
+        kwargs.setdefault("profiles", PROFILES)
+        pool = render_pool.RenderPool(**kwargs).start()
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_pending=True)
+
+def wait_for_status(pool, job_id, status, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if pool.status(job_id)["status"] == status:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} never reached {status}: {pool.status(job_id)}")
+
+def test_jobs_render_and_report_progress(slides, pool_factory):
+    events = []
+    pool = pool_factory(workers=2, on_event=events.append)
+    ids = [pool.submit(slides(f"job{n}")) for n in range(3)]
+
+    assert pool.wait(timeout=10)
+    assert [pool.status(job_id)["status"] for job_id in ids] == ["done"] * 3
+    assert any(event["type"] == "progress" for event in events)
+    assert pool.stats()["done"] == 3
+
+def test_full_queue_rejects_non_blocking_submit(slides, pool_factory):
+    pool = pool_factory(workers=1, max_pending=1)
+    running = pool.submit(slides("slow"))
+    wait_for_status(pool, running, "running")
+    queued = pool.submit(slides("slow"))
+
+    assert pool.submit(slides("slow"), block=False) is None
+    assert pool.submit(slides("slow"), timeout=0.1) is None
+    assert set(pool.jobs) == {running, queued}
+
+def test_cancel_pending_and_running_jobs(slides, pool_factory):
+    pool = pool_factory(workers=1)
+    slow_dir = slides("slow")
+    running = pool.submit(slow_dir)
+    wait_for_status(pool, running, "running")
+    pending = pool.submit(slides("job"))
+
+    assert pool.cancel(pending)
+    assert pool.cancel(running)
+    assert pool.wait(timeout=10)
+
+    assert pool.status(running)["status"] == "cancelled"
+    assert pool.status(pending)["status"] == "cancelled"
+    # The half-written video of the running job is removed
+    assert not os.path.exists(os.path.join(slow_dir, "final_video.mp4"))
+    assert not pool.cancel(running)
+
+def test_shutdown_cancels_pending_jobs(slides):
+    pool = render_pool.RenderPool(workers=1, profiles=PROFILES).start()
+    running = pool.submit(slides("slow"))
+    wait_for_status(pool, running, "running")
+    pending = [pool.submit(slides("slow")) for _ in range(2)]
+
+    start = time.time()
+    pool.shutdown(wait=True, cancel_pending=True)
+
+    assert time.time() - start < 5
+    assert [pool.status(job_id)["status"] for job_id in [running] + pending] == ["cancelled"] * 3
+    assert not any(process.is_alive() for process in pool._processes)
+
+def test_crashed_worker_fails_its_job_and_is_replaced(slides, pool_factory):
+    pool = pool_factory(workers=1)
+    first_pid = pool._processes[0].pid
+    crashed = pool.submit(slides("crash"))
+    after = pool.submit(slides("job"))
+
+    assert pool.wait(timeout=10)
+    assert pool.status(crashed)["status"] == "failed"
+    assert "exited with code 3" in pool.status(crashed)["error"]
+    # Only one worker: the second job ran on its replacement
+    assert pool.status(after)["status"] == "done"
+    assert pool._processes[0].pid != first_pid
+    assert pool._processes[0].is_alive()
+
+def test_thread_budget_covers_every_encoder_and_the_compositor():
+    profiles = {name: {"filename": f"{name}.mp4"} for name in ("tiktok", "reels", "shorts")}
+    pool = render_pool.RenderPool(workers=1, threads_per_job=2, profiles=profiles)
+    try:
+        assert pool.threads_per_job == 4
+        too_many = {f"p{n}": {"filename": f"p{n}.mp4"} for n in range(5)}
+        with pytest.raises(ValueError):
+            pool.submit("unused", profiles=too_many)
+    finally:
+        pool.shutdown()
@@ -0,0 +1,81 @@
+import os
+import sys
+import types
+import importlib
+
+import pytest
+
+import video_export
+
+@pytest.fixture
+def generator(monkeypatch, tmp_path):
+    """Imports tiktok_generator off Windows, without a real key, inside tmp_path."""
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    # msvcrt only backs the console input loop, which these tests don't use
+    monkeypatch.setitem(sys.modules, "msvcrt", types.ModuleType("msvcrt"))
+    monkeypatch.delitem(sys.modules, "tiktok_generator", raising=False)
+    module = importlib.import_module("tiktok_generator")
+
+    monkeypatch.chdir(tmp_path)
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    for n in range(1, 6):
+        (output_dir / f"slide_{n}_20260101_000000.png").write_bytes(b"png")
+    monkeypatch.setattr(video_export, "build_slideshow_clip", lambda images: object())
+    return module
+
+def fake_export(monkeypatch, profiles, error=None, write=True):
+    """Replaces the export pass; each profile 'writes' its file, tiktok may fail."""
+    monkeypatch.setattr(video_export, "load_export_profiles", lambda: profiles)
+
+    def export_profiles(clip, output_dir, profiles, threads=4, on_progress=None):
+        reports = {}
+        for name, profile in profiles.items():
+            path = os.path.join(output_dir, profile["filename"])
+            if write:
+                with open(path, "wb") as f:
+                    f.write(b"video")
+            reports[name] = {"path": path, "error": error if name == "tiktok" else None}
+        return reports
+
+    monkeypatch.setattr(video_export, "export_profiles", export_profiles)
+
+STALE = os.path.join("output", "final_video.mp4")
+
+def write_stale_video():
+    with open(STALE, "wb") as f:
+        f.write(b"old video")
+
+def test_slideshow_returns_tiktok_video(generator, monkeypatch):
+    write_stale_video()
+    fake_export(monkeypatch, {
+        "tiktok": {"filename": "final_video.mp4"},
+        "reels": {"filename": "reels_video.mp4"},
+    })
+
+    assert generator.generate_slideshow() == STALE
+    with open(STALE, "rb") as f:
+        assert f.read() == b"video"
+
+def test_slideshow_without_tiktok_profile_fails(generator, monkeypatch):
+    write_stale_video()
+    fake_export(monkeypatch, {"reels": {"filename": "reels_video.mp4"}})
+
+    assert generator.generate_slideshow() is None
+    assert not os.path.exists(STALE)
+    assert os.path.exists(os.path.join("output", "reels_video.mp4"))
+
+def test_slideshow_with_failed_tiktok_profile_fails(generator, monkeypatch):
+    write_stale_video()
+    fake_export(monkeypatch, {"tiktok": {"filename": "final_video.mp4"}}, error="broken pipe")
+
+    assert generator.generate_slideshow() is None
+    # The truncated file from the failed encoder is removed too
+    assert not os.path.exists(STALE)
+
+def test_slideshow_with_renamed_tiktok_profile_fails(generator, monkeypatch):
+    write_stale_video()
+    fake_export(monkeypatch, {"tiktok": {"filename": "tiktok_custom.mp4"}})
+
+    assert generator.generate_slideshow() is None
+    assert not os.path.exists(STALE)
@@ -0,0 +1,29 @@
+import tiktok_uploader
+
+class FakeDriver:
+    """Serves current_url from a list of urls, one per poll; raises once they run out."""
+
+    def __init__(self, urls):
+        self.urls = list(urls)
+
+    @property
+    def current_url(self):
+        if not self.urls:
+            raise RuntimeError("no such window")
+        return self.urls.pop(0)
+
+UPLOAD_URL = "https://www.tiktok.com/tiktokstudio/upload"
+
+def test_wait_for_review_reports_a_post(monkeypatch):
+    monkeypatch.setattr(tiktok_uploader.time, "sleep", lambda seconds: None)
+    driver = FakeDriver([UPLOAD_URL, UPLOAD_URL, "https://www.tiktok.com/tiktokstudio/content"])
+    assert tiktok_uploader.wait_for_review(driver) is True
+
+def test_wait_for_review_timeout_is_not_a_post(monkeypatch):
+    monkeypatch.setenv("TIKTOK_REVIEW_SECONDS", "0")
+    assert tiktok_uploader.wait_for_review(FakeDriver([UPLOAD_URL])) is False
+
+def test_closed_window_is_not_a_post(monkeypatch):
+    monkeypatch.setattr(tiktok_uploader.time, "sleep", lambda seconds: None)
+    assert tiktok_uploader.wait_for_review(FakeDriver([UPLOAD_URL])) is False
+    assert tiktok_uploader.left_upload_page(FakeDriver([])) is False
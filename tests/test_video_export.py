@@ -0,0 +1,156 @@
+import json
+
+import numpy as np
+
+import video_export
+
+def test_load_export_profiles_defaults(monkeypatch):
+    monkeypatch.delenv("EXPORT_PROFILES", raising=False)
+    monkeypatch.delenv("EXPORT_PROFILES_FILE", raising=False)
+
+    profiles = video_export.load_export_profiles()
+    assert list(profiles) == ["tiktok", "reels", "shorts"]
+    assert profiles["tiktok"]["filename"] == "final_video.mp4"
+
+    # Callers get copies, not the module defaults
+    profiles["tiktok"]["fps"] = 99
+    assert video_export.DEFAULT_EXPORT_PROFILES["tiktok"]["fps"] == 24
+
+def test_load_export_profiles_file_overrides(monkeypatch, tmp_path):
+    profiles_file = tmp_path / "profiles.json"
+    profiles_file.write_text(json.dumps({
+        "TikTok": {"fps": 60},
+        "Snap": {"filename": "snap_video.mp4", "size": [720, 1280], "fps": 30},
+    }))
+    monkeypatch.setenv("EXPORT_PROFILES_FILE", str(profiles_file))
+    monkeypatch.delenv("EXPORT_PROFILES", raising=False)
+
+    profiles = video_export.load_export_profiles()
+    assert profiles["tiktok"]["fps"] == 60
+    # Keys not in the override are kept
+    assert profiles["tiktok"]["filename"] == "final_video.mp4"
+    assert profiles["snap"]["size"] == [720, 1280]
+
+def test_load_export_profiles_filter(monkeypatch, capsys):
+    monkeypatch.delenv("EXPORT_PROFILES_FILE", raising=False)
+    monkeypatch.setenv("EXPORT_PROFILES", " Shorts , tiktok,bogus,")
+
+    profiles = video_export.load_export_profiles()
+    assert list(profiles) == ["shorts", "tiktok"]
+    assert "Unknown export profile 'bogus' ignored." in capsys.readouterr().out
+
+def test_load_export_profiles_bad_file(monkeypatch, tmp_path, capsys):
+    monkeypatch.delenv("EXPORT_PROFILES", raising=False)
+
+    monkeypatch.setenv("EXPORT_PROFILES_FILE", str(tmp_path / "missing.json"))
+    assert list(video_export.load_export_profiles()) == ["tiktok", "reels", "shorts"]
+    assert "not found" in capsys.readouterr().out
+
+    broken = tmp_path / "broken.json"
+    broken.write_text("{not json")
+    monkeypatch.setenv("EXPORT_PROFILES_FILE", str(broken))
+    assert list(video_export.load_export_profiles()) == ["tiktok", "reels", "shorts"]
+    assert "Failed to read export profiles" in capsys.readouterr().out
+
+def test_thread_budget_keeps_a_core_for_the_render_loop():
+    assert video_export.encoder_threads(4, 3) == 1
+    assert video_export.encoder_threads(7, 3) == 2
+    assert video_export.encoder_threads(1, 3) == 1
+    assert video_export.min_threads(3) == 4
+
+class FakeClip:
+    """Stands in for a moviepy clip: duration, size and iter_frames()."""
+
+    def __init__(self, duration, size=(4, 8)):
+        self.duration = duration
+        self.size = size
+        self.frames_rendered = 0
+
+    def iter_frames(self, fps, with_times, dtype):
+        for index in range(int(np.ceil(self.duration * fps))):
+            self.frames_rendered += 1
+            yield index / fps, np.zeros((self.size[1], self.size[0], 3), dtype=dtype)
+
+class FakeWriter:
+    def __init__(self, fail_after=None):
+        self.frames = 0
+        self.closed = False
+        self.fail_after = fail_after
+
+    def write_frame(self, frame):
+        assert not self.closed
+        if self.fail_after is not None and self.frames >= self.fail_after:
+            raise IOError("broken pipe")
+        self.frames += 1
+
+    def close(self):
+        self.closed = True
+
+def install_fake_writers(monkeypatch, **fail_after):
+    writers = {}
+    threads_used = {}
+
+    def build_writer(path, clip, master_fps, profile, threads):
+        name = profile["name"]
+        writers[name] = FakeWriter(fail_after.get(name))
+        threads_used[name] = threads
+        return writers[name]
+
+    monkeypatch.setattr(video_export, "_build_writer", build_writer)
+    return writers, threads_used
+
+def make_profiles(**max_durations):
+    return {
+        name: {"name": name, "filename": f"{name}.mp4", "fps": 10, "max_duration": max_duration}
+        for name, max_duration in max_durations.items()
+    }
+
+def test_export_closes_each_profile_at_its_max_duration(monkeypatch, tmp_path):
+    writers, threads_used = install_fake_writers(monkeypatch)
+    clip = FakeClip(duration=5.0)
+    closed_at = {}
+
+    def on_progress(done, total):
+        for name, writer in writers.items():
+            if writer.closed:
+                closed_at.setdefault(name, done)
+
+    reports = video_export.export_profiles(clip, str(tmp_path), make_profiles(short=1.0, long=3.0), threads=5, on_progress=on_progress)
+
+    assert writers["short"].frames == 10
+    assert writers["long"].frames == 30
+    # The short encoder finished long before the long one
+    assert closed_at["short"] <= 11
+    assert "long" not in closed_at
+    assert all(writer.closed for writer in writers.values())
+    # Rendering stops once no profile needs frames, not at the end of the clip
+    assert clip.frames_rendered == 31
+    assert reports["short"]["duration"] == 1.0
+    assert reports["short"]["error"] is None
+    assert threads_used == {"short": 2, "long": 2}
+
+def test_export_failed_encoder_does_not_stop_others(monkeypatch, tmp_path):
+    writers, _ = install_fake_writers(monkeypatch, bad=3)
+    reports = video_export.export_profiles(FakeClip(duration=2.0), str(tmp_path), make_profiles(bad=10, good=10), threads=1)
+
+    assert reports["bad"]["error"] == "broken pipe"
+    assert writers["bad"].closed
+    assert reports["good"]["error"] is None
+    assert writers["good"].frames == 20
+
+def test_export_cancel_closes_all_writers(monkeypatch, tmp_path):
+    writers, _ = install_fake_writers(monkeypatch)
+
+    def on_progress(done, total):
+        if done == 5:
+            raise video_export.ExportCancelled()
+
+    try:
+        video_export.export_profiles(FakeClip(duration=2.0), str(tmp_path), make_profiles(a=10, b=10), on_progress=on_progress)
+    except video_export.ExportCancelled:
+        pass
+    else:
+        raise AssertionError("ExportCancelled was swallowed")
+
+    assert all(writer.closed for writer in writers.values())
+    assert writers["a"].frames == 5
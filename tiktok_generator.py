@@ -12,14 +12,9 @@ import sys
 import time
 import re # For sanitization
 import tiktok_uploader # Import the uploader module
+import video_export # Multi-profile video export
 from PIL import Image, ImageDraw, ImageFont # For text rendering
-
-# PATCH: Fix for moviepy 1.0.3 using Pillow 10+
-if not hasattr(Image, 'ANTIALIAS'):
-    Image.ANTIALIAS = Image.LANCZOS
-
 import textwrap # For wrapping text
-from moviepy.editor import ImageClip, concatenate_videoclips, CompositeVideoClip
 
 # Initialize colorama
 init(autoreset=True)
@@ -174,6 +169,7 @@ def generate_carousel():
             
             print(Fore.YELLOW + "\nDescription Preview:")
             print(f"  {data.get('post_description', '')[:100]}...")
+            return data
             
         except json.JSONDecodeError:
             print(Fore.RED + "Failed to parse JSON response from OpenAI.")
@@ -253,6 +249,8 @@ def generate_image(slide_number):
             print(Fore.CYAN + f"Overlaying caption: \"{caption}\"")
             overlay_text_on_image(filename, caption)
             print(Fore.GREEN + f"Caption applied.")
+
+        return filename
             
     except Exception as e:
         print(Fore.RED + f"Error generating image: {e}")
@@ -383,8 +381,11 @@ def generate_all_images():
     for i in range(1, 6):
         generate_image(i)
         
-def generate_slideshow():
-    """Compiles generated images into a video slideshow with transitions."""
+def generate_slideshow(on_progress=None):
+    """
+    Compiles generated images into a video slideshow with transitions.
+    on_progress(frames_done, total_frames) is forwarded to the export pass.
+    """
     print(Fore.CYAN + "\nGenerating video slideshow...")
     
     output_dir = "output"
@@ -393,50 +394,39 @@ def generate_slideshow():
         return
 
     # Get images sorted by slide number
-    images = [os.path.join(output_dir, f) for f in os.listdir(output_dir) if f.endswith(('.png', '.jpg', '.jpeg')) and 'slide_' in f]
-    images.sort(key=lambda x: int(x.split('slide_')[1].split('_')[0]))
+    images = video_export.find_slide_images(output_dir)
 
     if not images:
         print(Fore.RED + "No images found to generate video.")
         return
 
+    # The uploader always posts final_video.mp4. Drop the one from a previous
+    # VIDEO run so a disabled or failed "tiktok" profile can't leave it stale.
+    upload_video = os.path.join(output_dir, "final_video.mp4")
+    if os.path.exists(upload_video):
+        os.remove(upload_video)
+
     try:
-        clips = []
-        for img_path in images:
-            # Create ImageClip, set duration to 3.0 seconds
-            # 2.5s for static + 0.5s for transition overlap = ~2.0s clear viewing time
-            # Resize to ensure 1080x1920 (TikTok 9:16)
-            clip = ImageClip(img_path).set_duration(3.0).resize(newsize=(1080, 1920))
-            clips.append(clip)
-        
-        # Concatenate with crossfade transition
-        # We need to set start times for crossfades or use a method that handles it
-        # Simple method: crossfadein on each clip (except first)
-        
-        # improved method for smooth transition:
-        # We will overlap clips by 0.5 seconds and crossfade
-        final_clips = [clips[0]]
-        for clip in clips[1:]:
-            # Make the clip fade in over the previous one
-            final_clips.append(clip.crossfadein(0.5))
-        
-        # CompositeVideoClip allows layering; concatenate_videoclips with padding/overlap is cleaner for slideshows
-        # Let's use compose method for simple crossfades
-        video = concatenate_videoclips(final_clips, method="compose", padding=-0.5) 
-        
-        output_path = os.path.join(output_dir, "final_video.mp4")
-        
-        # Write video file
-        # fps=24 is sufficient for static slides
-        video.write_videofile(
-            output_path, 
-            fps=24, 
-            codec="libx264", 
-            audio=False, 
-            preset="medium",
-            threads=4
-        )
-        
+        video = video_export.build_slideshow_clip(images)
+
+        # Render the slides once and feed every enabled export profile
+        # (TikTok, Reels, Shorts, ...) from the same frame stream.
+        # See EXPORT_PROFILES / EXPORT_PROFILES_FILE in .env
+        profiles = video_export.load_export_profiles()
+        # This is the only render on the machine, so give the encoders every core
+        reports = video_export.export_profiles(video, output_dir, profiles, threads=os.cpu_count() or 4, on_progress=on_progress)
+
+        # The uploader expects final_video.mp4, which the "tiktok" profile writes
+        tiktok_report = reports.get("tiktok")
+        if not tiktok_report or tiktok_report["error"] or tiktok_report["path"] != upload_video:
+            print(Fore.RED + "The tiktok profile did not write final_video.mp4, so there is no video to POST.")
+            print(Fore.YELLOW + "Enable it in EXPORT_PROFILES (and keep its filename) to upload from this tool.")
+            # A failed encoder can leave a truncated file behind
+            if os.path.exists(upload_video):
+                os.remove(upload_video)
+            return None
+
+        output_path = tiktok_report["path"]
         print(Fore.GREEN + f"\nVideo generated successfully: {output_path}")
         return output_path
 
@@ -444,8 +434,12 @@ def generate_slideshow():
         print(Fore.RED + f"Error generating video: {e}")
         return None
 
-def upload_post():
-    """Triggers the Selenium uploader."""
+def upload_post(interactive=True):
+    """
+    Triggers the Selenium uploader. Returns the uploader's {"posted", "caption_set"}
+    result once the post reached the review step, otherwise a falsy value.
+    interactive=False never waits for console input (used by pipeline_service).
+    """
     global last_generated_content
     if not last_generated_content:
         print(Fore.RED + "No content generated yet.")
@@ -462,12 +456,16 @@ def upload_post():
         print(Fore.RED + "No images found in output/ folder! Generate images first.")
         return
 
-    tiktok_uploader.upload_to_tiktok(desc, hashtags)
+    result = tiktok_uploader.upload_to_tiktok(desc, hashtags, interactive=interactive)
+    if not result:
+        print(Fore.RED + "Upload did not complete.")
+        return False
     
     # Optional: Clear after successful post? User said "clear up the job when the job is done"
     # But usually it's safer to keep files until next run. 
     # Let's ask or just leave it for the next GENERATE to clean.
     print(Fore.YELLOW + "Job complete. Files will be cleared on next GENERATE.")
+    return result
 
 def main():
     print(Fore.MAGENTA + "Welcome to the TikTok Carousel Generator!")
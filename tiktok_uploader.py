@@ -13,7 +13,15 @@ from colorama import init, Fore
 init(autoreset=True)
 load_dotenv()
 
-def upload_to_tiktok(description, hashtags, audio_path=None):
+def upload_to_tiktok(description, hashtags, audio_path=None, interactive=True):
+    """
+    Attaches output/final_video.mp4 and the caption in TikTok's upload page.
+    Returns False if the post could not reach the review step, otherwise
+    {"posted": ..., "caption_set": ...}: posted is True only if the browser left
+    the upload page (the user clicked Post) before it closed.
+    With interactive=False nothing waits for console input: a missing login fails
+    right away and the browser stays open for review for TIKTOK_REVIEW_SECONDS.
+    """
     print(Fore.CYAN + "\nStarting TikTok Uploader...")
 
     # 1. Setup Chrome Options
@@ -48,7 +56,7 @@ def upload_to_tiktok(description, hashtags, audio_path=None):
     except Exception as e:
         print(Fore.RED + "Failed to launch browser. Ensure you have the correct driver installed or use Google Chrome.")
         print(f"Error: {e}")
-        return
+        return False
     
     try:
         # 2. Go to Upload Page
@@ -63,6 +71,9 @@ def upload_to_tiktok(description, hashtags, audio_path=None):
             current_url = driver.current_url
             if "login" in current_url:
                 print(Fore.RED + "You are not logged in!")
+                if not interactive:
+                    print(Fore.YELLOW + "Log in once from the interactive POST command, then retry.")
+                    return False
                 print(Fore.YELLOW + "Please log in to TikTok in the browser window.")
                 print(Fore.YELLOW + "Press Enter here once you are logged in and on the upload page...")
                 input()
@@ -78,7 +89,7 @@ def upload_to_tiktok(description, hashtags, audio_path=None):
         
         if not os.path.exists(video_path):
             print(Fore.RED + "No final_video.mp4 found in /output! Generate video first.")
-            return
+            return False
 
         print(Fore.WHITE + f"Uploading video: {video_path}")
         
@@ -94,14 +105,16 @@ def upload_to_tiktok(description, hashtags, audio_path=None):
             print(Fore.GREEN + "Video uploaded to browser.")
         except Exception as e:
             print(Fore.RED + f"Could not find file input element. TikTok UI might have changed.\nError: {e}")
-            input("Press Enter to continue...")
-            return
+            if interactive:
+                input("Press Enter to continue...")
+            return False
 
         # 5. Set Caption
         print(Fore.CYAN + "Setting caption...")
         time.sleep(5) # Wait for upload to process slightly
         
         full_caption = f"{description}\n\n{hashtags}"
+        caption_set = False
         
         # Find the editor content editable div
         try:
@@ -120,6 +133,7 @@ def upload_to_tiktok(description, hashtags, audio_path=None):
             time.sleep(0.5) # Short pause
             
             caption_box.send_keys(full_caption)
+            caption_set = True
             print(Fore.GREEN + "Caption set.")
         except Exception as e:
              print(Fore.RED + f"Could not automatically set caption. Please paste it manually. Error: {e}")
@@ -129,14 +143,48 @@ def upload_to_tiktok(description, hashtags, audio_path=None):
         print(Fore.MAGENTA + "\nSUCCESS! Images and caption are ready.")
         print(Fore.YELLOW + "Review the post in the browser.")
         print(Fore.YELLOW + "Click 'Post' in the browser when ready.")
-        print(Fore.WHITE + "Press Enter here to close the browser and finish...")
-        input()
+        if interactive:
+            print(Fore.WHITE + "Press Enter here to close the browser and finish...")
+            input()
+            posted = left_upload_page(driver)
+        else:
+            posted = wait_for_review(driver)
+        if not posted:
+            print(Fore.YELLOW + "The post was not published from this browser session.")
+        return {"posted": posted, "caption_set": caption_set}
         
     except Exception as e:
         print(Fore.RED + f"An error occurred: {e}")
+        return False
     finally:
         driver.quit()
 
+def left_upload_page(driver):
+    """True if the browser navigated away from the upload page, which TikTok does after Post."""
+    try:
+        return "upload" not in driver.current_url
+    except Exception:
+        # Window closed by the user: nothing says the post went out
+        return False
+
+def wait_for_review(driver):
+    """
+    Keeps the browser open until the user posts (leaves the upload page) or the review time runs out.
+    Returns True if the page left the upload URL, False on timeout or a closed window.
+    """
+    review_seconds = int(os.getenv("TIKTOK_REVIEW_SECONDS") or 300)
+    print(Fore.WHITE + f"Browser closes after posting or in {review_seconds}s.")
+    deadline = time.time() + review_seconds
+    while time.time() < deadline:
+        try:
+            if "upload" not in driver.current_url:
+                return True
+        except Exception:
+            # Window closed by the user
+            return False
+        time.sleep(2)
+    return False
+
 if __name__ == "__main__":
     # Test run
     upload_to_tiktok("Test Description", "#test")
@@ -0,0 +1,261 @@
+import os
+import json
+import math
+import time
+from colorama import init, Fore
+from PIL import Image
+
+# PATCH: Fix for moviepy 1.0.3 using Pillow 10+
+if not hasattr(Image, 'ANTIALIAS'):
+    Image.ANTIALIAS = Image.LANCZOS
+
+from moviepy.editor import ImageClip, concatenate_videoclips
+from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+
+init(autoreset=True)
+
+# Each profile describes one encoder output fed from the shared frame stream.
+# "tiktok" keeps writing final_video.mp4 so the uploader keeps working unchanged.
+DEFAULT_EXPORT_PROFILES = {
+    "tiktok": {
+        "filename": "final_video.mp4",
+        "size": [1080, 1920],
+        "fps": 24,
+        "bitrate": None,
+        "max_duration": 600,
+        "preset": "medium",
+    },
+    "reels": {
+        "filename": "reels_video.mp4",
+        "size": [1080, 1920],
+        "fps": 30,
+        "bitrate": "5000k",
+        "max_duration": 90,
+        "preset": "medium",
+    },
+    "shorts": {
+        "filename": "shorts_video.mp4",
+        "size": [1080, 1920],
+        "fps": 30,
+        "bitrate": "8000k",
+        "max_duration": 60,
+        "preset": "medium",
+    },
+}
+
+def load_export_profiles():
+    """Returns the enabled export profiles, merged with EXPORT_PROFILES_FILE overrides."""
+    profiles = {name: dict(profile) for name, profile in DEFAULT_EXPORT_PROFILES.items()}
+
+    # Optional JSON file: {"profile_name": {"fps": 30, ...}, ...}
+    # Known profiles are updated key by key, unknown names are added as new profiles.
+    profiles_file = os.getenv("EXPORT_PROFILES_FILE")
+    if profiles_file:
+        if os.path.exists(profiles_file):
+            try:
+                with open(profiles_file, "r", encoding="utf-8") as f:
+                    overrides = json.load(f)
+                for name, settings in overrides.items():
+                    profiles.setdefault(name.lower(), {}).update(settings)
+            except (OSError, json.JSONDecodeError) as e:
+                print(Fore.RED + f"Failed to read export profiles from {profiles_file}: {e}")
+        else:
+            print(Fore.YELLOW + f"Export profiles file not found: {profiles_file}")
+
+    # Optional comma separated list of profiles to render, e.g. "tiktok,shorts"
+    enabled = os.getenv("EXPORT_PROFILES")
+    if enabled:
+        names = [name.strip().lower() for name in enabled.split(",") if name.strip()]
+        for name in names:
+            if name not in profiles:
+                print(Fore.YELLOW + f"Unknown export profile '{name}' ignored.")
+        profiles = {name: profiles[name] for name in names if name in profiles}
+
+    return profiles
+
+class ExportCancelled(Exception):
+    """Raised from an on_progress callback to abort an export pass."""
+
+def find_slide_images(output_dir):
+    """Returns the slide images in output_dir, sorted by slide number."""
+    images = [os.path.join(output_dir, f) for f in os.listdir(output_dir) if f.endswith(('.png', '.jpg', '.jpeg')) and 'slide_' in f]
+    images.sort(key=lambda x: int(x.split('slide_')[1].split('_')[0]))
+    return images
+
+def build_slideshow_clip(images):
+    """Builds the crossfaded 1080x1920 slideshow clip from the slide images."""
+    clips = []
+    for img_path in images:
+        # Create ImageClip, set duration to 3.0 seconds
+        # 2.5s for static + 0.5s for transition overlap = ~2.0s clear viewing time
+        # Resize to ensure 1080x1920 (TikTok 9:16)
+        clip = ImageClip(img_path).set_duration(3.0).resize(newsize=(1080, 1920))
+        clips.append(clip)
+    
+    # Concatenate with crossfade transition
+    # We will overlap clips by 0.5 seconds and crossfade
+    final_clips = [clips[0]]
+    for clip in clips[1:]:
+        # Make the clip fade in over the previous one
+        final_clips.append(clip.crossfadein(0.5))
+    
+    # CompositeVideoClip allows layering; concatenate_videoclips with padding/overlap is cleaner for slideshows
+    # Let's use compose method for simple crossfades
+    return concatenate_videoclips(final_clips, method="compose", padding=-0.5)
+
+def encoder_threads(threads, profile_count):
+    """
+    Threads each encoder gets from a pass budget of `threads` cores.
+    One core is kept for the render (compositing) loop itself.
+    """
+    return max(1, (threads - 1) // profile_count)
+
+def min_threads(profile_count):
+    """Smallest budget an export pass fits in: one thread per encoder plus the render loop."""
+    return profile_count + 1
+
+def _build_writer(path, clip, master_fps, profile, threads):
+    """Creates an ffmpeg encoder for one profile, scaling/retiming on the ffmpeg side."""
+    ffmpeg_params = []
+
+    width, height = profile.get("size", clip.size)
+    if [width, height] != list(clip.size):
+        ffmpeg_params.extend(["-vf", f"scale={width}:{height}"])
+
+    fps = profile.get("fps", master_fps)
+    if fps != master_fps:
+        # Output-side -r drops frames from the shared stream down to the profile rate
+        ffmpeg_params.extend(["-r", str(fps)])
+
+    return FFMPEG_VideoWriter(
+        path,
+        clip.size,
+        master_fps,
+        codec=profile.get("codec", "libx264"),
+        preset=profile.get("preset", "medium"),
+        bitrate=profile.get("bitrate"),
+        threads=threads,
+        ffmpeg_params=ffmpeg_params or None,
+    )
+
+def export_profiles(clip, output_dir, profiles, threads=4, on_progress=None):
+    """
+    Renders the clip once and streams every frame into one encoder per profile.
+    threads is the core budget for the whole pass: one for the render loop, the
+    rest split across the profiles' encoders (see encoder_threads).
+    on_progress(frames_done, total_frames) is called after every frame.
+    Returns a dict of profile name -> timing report. encoder_seconds is the
+    ffmpeg process lifetime (start to exit), pipe_wait_seconds the time the
+    render loop spent blocked writing to / flushing that encoder.
+    """
+    if not profiles:
+        print(Fore.RED + "No export profiles enabled.")
+        return {}
+
+    master_fps = max(profile.get("fps", 24) for profile in profiles.values())
+    threads_per_encoder = encoder_threads(threads, len(profiles))
+
+    reports = {}
+    writers = {}
+    encoder_starts = {}
+    for name, profile in profiles.items():
+        path = os.path.join(output_dir, profile.get("filename", f"{name}_video.mp4"))
+        reports[name] = {
+            "path": path,
+            "frames": 0,
+            "duration": 0.0,
+            "pipe_wait_seconds": 0.0,
+            "encoder_seconds": 0.0,
+            "error": None,
+        }
+        try:
+            writers[name] = _build_writer(path, clip, master_fps, profile, threads_per_encoder)
+            encoder_starts[name] = time.time()
+        except Exception as e:
+            reports[name]["error"] = str(e)
+            print(Fore.RED + f"[{name}] Failed to start encoder: {e}")
+
+    print(Fore.CYAN + f"Exporting {len(writers)} profile(s) from one render pass at {master_fps} fps...")
+
+    def close_writer(name):
+        # Closing waits for the encoder to flush and exit, so encoder_seconds
+        # is that profile's ffmpeg process lifetime
+        report = reports[name]
+        close_start = time.time()
+        try:
+            writers.pop(name).close()
+        except Exception as e:
+            report["error"] = report["error"] or str(e)
+        report["pipe_wait_seconds"] += time.time() - close_start
+        report["encoder_seconds"] = time.time() - encoder_starts[name]
+
+    # Rendering stops once the longest remaining profile has all its frames
+    render_duration = min(
+        clip.duration,
+        max(profiles[name].get("max_duration", clip.duration) for name in profiles),
+    )
+    # iter_frames yields one frame per 1/fps step in [0, duration)
+    total_frames = max(1, math.ceil(render_duration * master_fps))
+    frame_index = 0
+
+    render_start = time.time()
+    render_seconds = 0.0
+    try:
+        frame_start = time.time()
+        for t, frame in clip.iter_frames(fps=master_fps, with_times=True, dtype="uint8"):
+            render_seconds += time.time() - frame_start
+
+            for name in list(writers):
+                if t >= profiles[name].get("max_duration", clip.duration):
+                    # This profile is complete, finish its encoder now
+                    close_writer(name)
+                    continue
+                report = reports[name]
+                write_start = time.time()
+                try:
+                    writers[name].write_frame(frame)
+                except Exception as e:
+                    report["error"] = str(e)
+                    print(Fore.RED + f"[{name}] Encoder failed: {e}")
+                    close_writer(name)
+                    continue
+                # Time spent blocked on the ffmpeg pipe, i.e. waiting for this encoder
+                report["pipe_wait_seconds"] += time.time() - write_start
+                report["frames"] += 1
+                report["duration"] = t + 1.0 / master_fps
+
+            if not writers:
+                break
+
+            # The callback may raise (e.g. ExportCancelled) to abort the pass
+            frame_index += 1
+            if on_progress:
+                on_progress(frame_index, total_frames)
+            frame_start = time.time()
+    finally:
+        # Profiles that ran to the end of the clip, or every profile on abort,
+        # so no ffmpeg process is left behind
+        for name in list(writers):
+            close_writer(name)
+
+    total_seconds = time.time() - render_start
+    print_export_report(reports, render_seconds, total_seconds)
+    return reports
+
+def print_export_report(reports, render_seconds, total_seconds):
+    """Prints per-profile timings after an export pass."""
+    print(Fore.MAGENTA + "\nExport report:")
+    print(Fore.WHITE + f"  Shared render: {render_seconds:.2f}s | Wall clock: {total_seconds:.2f}s")
+    for name, report in reports.items():
+        if report["error"]:
+            print(Fore.RED + f"  {name}: FAILED ({report['error']})")
+            continue
+        size_mb = 0.0
+        if os.path.exists(report["path"]):
+            size_mb = os.path.getsize(report["path"]) / (1024 * 1024)
+        print(
+            Fore.GREEN
+            + f"  {name}: {report['frames']} frames, {report['duration']:.1f}s video, "
+            + f"encoder {report['encoder_seconds']:.2f}s (pipe/flush wait {report['pipe_wait_seconds']:.2f}s), "
+            + f"{size_mb:.1f} MB -> {report['path']}"
+        )